@@ -1,16 +1,21 @@
 #!/usr/bin/env python3
 
+import collections
+import io
 import logging
 import pathlib
 import textwrap
+from typing import BinaryIO, Iterable, Iterator
 
 import fire as fire
-import more_itertools
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
+CHUNK_SIZE = 2**16
+
 
 @pytest.mark.parametrize(
     "text, result",
@@ -38,21 +43,99 @@ def test_solution_1_by_example(text, result):
     assert solution_1(text) == result
 
 
-def solution_1(text):
+def _parse_depths(f: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[int]:
+    """Yield every depth in `f` reading it one chunk of bytes at a time"""
+    num = None
+    while chunk := f.read(chunk_size):
+        for byte in chunk:
+            if 0x30 <= byte <= 0x39:
+                num = (num or 0) * 10 + byte - 0x30
+            elif num is not None:
+                yield num
+                num = None
+    if num is not None:
+        yield num
+
+
+def _read_depths(text, chunk_size: int = CHUNK_SIZE) -> Iterator[int]:
+    try:
+        f = open(text, "rb")
+    except FileNotFoundError:
+        f = io.BytesIO(text.encode())
+    with f:
+        yield from _parse_depths(f, chunk_size)
+
+
+def _num_increases(depths: Iterable[int], window_size: int) -> int:
+    """Return the number of times the sum of a sliding window increases"""
+    window = collections.deque(maxlen=window_size)
+    result = 0
+    for depth in depths:
+        if len(window) == window_size and window[0] < depth:
+            result += 1
+        window.append(depth)
+    return result
+
+
+def _read_depth_array(text) -> np.ndarray:
     try:
-        text = pathlib.Path(text).read_text()
+        return np.fromfile(text, dtype=np.int64, sep=" ")
     except FileNotFoundError:
-        pass
-    distances = [int(line.strip()) for line in text.splitlines()]
-    return sum(left < right for left, right in more_itertools.pairwise(distances))
+        return np.fromstring(text, dtype=np.int64, sep=" ")
+
+
+def _nums_increases(depths: np.ndarray, window_sizes: Iterable[int]) -> dict[int, int]:
+    """Return the number of times the sum of a sliding window increases by size"""
+    result = {}
+    for window_size in window_sizes:
+        assert window_size > 0
+        increases = depths[:-window_size] < depths[window_size:]
+        result[window_size] = int(np.count_nonzero(increases))
+    return result
+
+
+def solution_1(text, streaming=False):
+    if streaming:
+        return _num_increases(_read_depths(text), 1)
+    return _nums_increases(_read_depth_array(text), [1])[1]
+
+
+def solution_2(path, streaming=False):
+    if streaming:
+        return _num_increases(_read_depths(path), 3)
+    return _nums_increases(_read_depth_array(path), [3])[3]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, CHUNK_SIZE])
+def test_read_depths_across_chunk_boundaries(chunk_size):
+    actual = list(_read_depths(INPUTS_PATH / "example.txt", chunk_size))
+    expected = [199, 200, 208, 210, 200, 207, 240, 269, 260, 263]
+    assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "window_size, expected",
+    [
+        (1, 7),
+        (3, 5),
+        (9, 1),
+        (10, 0),
+    ],
+)
+def test_num_increases_by_window_size(window_size, expected):
+    depths = _read_depths(INPUTS_PATH / "example.txt")
+    assert _num_increases(depths, window_size) == expected
 
 
-def solution_2(path):
-    path = pathlib.Path(path)
-    text = path.read_text()
-    nums = [int(line.strip().split()[0]) for line in text.splitlines()]
-    sums = [sum(triple) for triple in more_itertools.triplewise(nums)]
-    return sum(left < right for left, right in more_itertools.pairwise(sums))
+def test_nums_increases_agrees_with_streaming():
+    window_sizes = range(1, 12)
+    depths = _read_depth_array(INPUTS_PATH / "example.txt")
+    actual = _nums_increases(depths, window_sizes)
+    expected = {
+        k: _num_increases(_read_depths(INPUTS_PATH / "example.txt"), k)
+        for k in window_sizes
+    }
+    assert actual == expected
 
 
 @pytest.mark.parametrize(
@@ -64,6 +147,7 @@ def solution_2(path):
 )
 def test_part_1_on_examples(stem, expected):
     assert solution_1(INPUTS_PATH / f"{stem}.txt") == expected
+    assert solution_1(INPUTS_PATH / f"{stem}.txt", streaming=True) == expected
 
 
 @pytest.mark.parametrize(
@@ -75,6 +159,7 @@ def test_part_1_on_examples(stem, expected):
 )
 def test_part_2_on_examples(stem, expected):
     assert solution_2(INPUTS_PATH / f"{stem}.txt") == expected
+    assert solution_2(INPUTS_PATH / f"{stem}.txt", streaming=True) == expected
 
 
 if __name__ == "__main__":
@@ -1,11 +1,34 @@
 #!/usr/bin/env python3
-import collections
+import concurrent.futures
+import dataclasses
+import functools
+import itertools
 import logging
+import os
 import pathlib
+from typing import Iterable, Iterator, Tuple
+
+import numpy as np
+import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
+FORWARD, DOWN, UP = DIRECTIONS = ("forward", "down", "up")
+UNKNOWN = 0xFF
+
+
+def _direction_table() -> np.ndarray:
+    """Return a table from the first byte of a command to its index in `DIRECTIONS`"""
+    result = np.full(256, UNKNOWN, dtype=np.uint8)
+    for i, direction in enumerate(DIRECTIONS):
+        assert result[ord(direction[0])] == UNKNOWN
+        result[ord(direction[0])] = i
+    return result
+
+
+DIRECTION_CODES = _direction_table()
+
 
 def test_example_1():
     assert solution_1(INPUTS_PATH / "example.txt") == 150
@@ -23,6 +46,54 @@ def test_input_2():
     assert solution_2(INPUTS_PATH / "input.txt") == 2086357770
 
 
+def test_command_arrays():
+    codes, distances = _command_arrays((INPUTS_PATH / "example.txt").read_bytes())
+    assert [DIRECTIONS[code] for code in codes] == [
+        FORWARD,
+        DOWN,
+        FORWARD,
+        UP,
+        DOWN,
+        FORWARD,
+    ]
+    assert distances.tolist() == [5, 5, 8, 3, 8, 2]
+
+
+@pytest.mark.parametrize(
+    "data, expected",
+    [
+        (b"forward 5\r\ndown 12\r\n", [5, 12]),
+        (b"forward 5 \nup 3\n", [5, 3]),
+        (b"\ndown 7", [7]),
+    ],
+)
+def test_command_arrays_tolerates_trailing_whitespace(data, expected):
+    _, distances = _command_arrays(data)
+    assert distances.tolist() == expected
+
+
+@pytest.mark.parametrize(
+    "data", [b"fly 5\n", b"forwardd 5\n", b"forward\n", b"forward 5x\n", b"up5\n"]
+)
+def test_command_arrays_rejects_malformed_commands(data):
+    with pytest.raises(ValueError):
+        _command_arrays(data)
+
+
+@pytest.mark.parametrize("num_chunk", [1, 2, 3, 100])
+def test_chunked_summaries_compose(num_chunk):
+    path = INPUTS_PATH / "example.txt"
+    chunks = _byte_ranges(path, num_chunk)
+    actual = functools.reduce(
+        Summary.__add__, (_chunk_summary(path, *chunk) for chunk in chunks)
+    )
+    assert actual == _summary(_commands(path.read_text()))
+
+
+def test_example_2_in_parallel():
+    assert solution_2(INPUTS_PATH / "example.txt", num_process=3) == 900
+
+
 def _commands(text: str):
     for line in text.splitlines():
         if not line:
@@ -33,22 +104,82 @@ def _commands(text: str):
         yield direction, int(distance)
 
 
+def _command_arrays(data: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the index in `DIRECTIONS` and the distance of every command"""
+    chars = np.frombuffer(data, dtype=np.uint8)
+    (newlines,) = np.nonzero(chars == ord("\n"))
+    if not data.endswith(b"\n"):
+        newlines = np.append(newlines, len(chars))
+    starts = np.concatenate([[0], newlines[:-1] + 1])
+    ends = newlines
+    while True:
+        last = chars[np.maximum(ends - 1, 0)]
+        is_trailing = (ends > starts) & ((last == ord("\r")) | (last == ord(" ")))
+        if not is_trailing.any():
+            break
+        ends = ends - is_trailing
+    is_empty = starts == ends
+    if is_empty.any():
+        starts, ends = starts[~is_empty], ends[~is_empty]
+
+    codes = DIRECTION_CODES[chars[starts]]
+    if np.any(codes == UNKNOWN):
+        raise ValueError("Expected every command to start with a known direction")
+
+    distances = np.zeros(len(ends), dtype=np.int64)
+    num_digits = np.zeros(len(ends), dtype=np.int64)
+    is_digit = np.ones(len(ends), dtype=bool)
+    for exponent in itertools.count():
+        digits = chars[np.maximum(ends - 1 - exponent, 0)] - np.uint8(ord("0"))
+        is_digit &= (digits < 10) & (ends - 1 - exponent >= starts)
+        if not is_digit.any():
+            break
+        distances += np.where(is_digit, digits, 0) * np.int64(10**exponent)
+        num_digits += is_digit
+
+    keywords = [np.frombuffer(f"{d} ".encode(), dtype=np.uint8) for d in DIRECTIONS]
+    keyword_lengths = np.array([len(keyword) for keyword in keywords])[codes]
+    if not np.all(num_digits) or np.any(starts + keyword_lengths != ends - num_digits):
+        raise ValueError("Expected every command to be a direction and a distance")
+    for code, keyword in enumerate(keywords):
+        keyword_starts = starts[codes == code]
+        for i, char in enumerate(keyword):
+            if np.any(chars[keyword_starts + i] != char):
+                raise ValueError(f"Expected every command to be one of {DIRECTIONS}")
+    return codes, distances
+
+
 def solution_1(path):
-    aggregate = collections.defaultdict(int)
-    for direction, distance in _commands(path.read_text()):
-        aggregate[direction] += distance
+    codes, distances = _command_arrays(path.read_bytes())
+    net_forward = distances[codes == DIRECTIONS.index(FORWARD)].sum()
+    net_down = (
+        distances[codes == DIRECTIONS.index(DOWN)].sum()
+        - distances[codes == DIRECTIONS.index(UP)].sum()
+    )
+    return int(net_forward * net_down)
+
+
+@dataclasses.dataclass(frozen=True)
+class Summary:
+    """Net effect of a sequence of commands on a submarine starting with zero aim"""
 
-    net_forward = aggregate.pop("forward", 0)
-    net_down = aggregate.pop("down", 0) - aggregate.pop("up", 0)
-    assert not aggregate
-    return net_forward * net_down
+    aim: int = 0
+    forward: int = 0
+    down: int = 0
 
+    def __add__(self, other: "Summary") -> "Summary":
+        return Summary(
+            self.aim + other.aim,
+            self.forward + other.forward,
+            self.down + other.down + self.aim * other.forward,
+        )
 
-def solution_2(path):
+
+def _summary(commands: Iterable[Tuple[str, int]]) -> Summary:
     aim = 0
     net_forward = 0
     net_down = 0
-    for direction, x in _commands(path.read_text()):
+    for direction, x in commands:
         if direction == "down":
             aim += x
         elif direction == "up":
@@ -58,6 +189,56 @@ def solution_2(path):
             net_down += aim * x
         else:
             assert False
-        logger.info("After %s %d we are at %d, %d", direction, x, net_forward, net_down)
-
-    return net_forward * net_down
+    return Summary(aim, net_forward, net_down)
+
+
+def _vectorized_summary(data: bytes) -> Summary:
+    codes, distances = _command_arrays(data)
+    forward = np.where(codes == DIRECTIONS.index(FORWARD), distances, 0)
+    aim = np.cumsum(
+        np.where(codes == DIRECTIONS.index(DOWN), distances, 0)
+        - np.where(codes == DIRECTIONS.index(UP), distances, 0)
+    )
+    return Summary(
+        int(aim[-1]) if len(aim) else 0,
+        int(forward.sum()),
+        int(np.dot(aim, forward)),
+    )
+
+
+def _byte_ranges(path: pathlib.Path, num_chunk: int) -> Iterator[Tuple[int, int]]:
+    """Yield up to `num_chunk` byte ranges covering the file, split on newlines"""
+    size = path.stat().st_size
+    with path.open("rb") as f:
+        start = 0
+        for i in range(1, num_chunk + 1):
+            f.seek(max(start, size * i // num_chunk))
+            f.readline()
+            stop = min(f.tell(), size)
+            if start < stop:
+                yield start, stop
+            start = stop
+
+
+def _chunk_summary(path: pathlib.Path, start: int, stop: int) -> Summary:
+    with path.open("rb") as f:
+        f.seek(start)
+        data = f.read(stop - start)
+    return _vectorized_summary(data)
+
+
+def solution_2(path, num_process=1):
+    path = pathlib.Path(path)
+    if num_process == 1:
+        total = _vectorized_summary(path.read_bytes())
+    else:
+        num_process = num_process or os.cpu_count()
+        with concurrent.futures.ProcessPoolExecutor(num_process) as executor:
+            futures = [
+                executor.submit(_chunk_summary, path, start, stop)
+                for start, stop in _byte_ranges(path, num_process)
+            ]
+            summaries = (future.result() for future in futures)
+            total = functools.reduce(Summary.__add__, summaries, Summary())
+
+    return total.forward * total.down
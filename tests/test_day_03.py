@@ -1,20 +1,19 @@
 #!/usr/bin/env python3
-import collections
 import logging
 import pathlib
 
-import more_itertools
+import numpy as np
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
 
 def test_gamma_rate():
-    assert _gamma_rate(INPUTS_PATH / "example.txt") == 22
+    assert _gamma_rate(_read_report(INPUTS_PATH / "example.txt")) == 22
 
 
 def test_epsilon_rate():
-    assert _epsilon_rate(INPUTS_PATH / "example.txt") == 9
+    assert _epsilon_rate(_read_report(INPUTS_PATH / "example.txt")) == 9
 
 
 def test_example_1():
@@ -26,11 +25,19 @@ def test_input_1():
 
 
 def test_oxygen_rating():
-    assert _oxygen_rating(INPUTS_PATH / "example.txt") == 23
+    sorted_report = _sorted_report(_read_report(INPUTS_PATH / "example.txt"))
+    assert _oxygen_rating(sorted_report) == 23
 
 
 def test_carbon_rating():
-    assert _carbon_rating(INPUTS_PATH / "example.txt") == 10
+    sorted_report = _sorted_report(_read_report(INPUTS_PATH / "example.txt"))
+    assert _carbon_rating(sorted_report) == 10
+
+
+def test_ratings_with_duplicate_lines():
+    sorted_report = _sorted_report(np.array([[1, 0, 1, 1], [1, 0, 1, 1], [0, 0, 0, 0]]))
+    assert _oxygen_rating(sorted_report) == 11
+    assert _carbon_rating(sorted_report) == 0
 
 
 def test_example_2():
@@ -41,79 +48,66 @@ def test_input_2():
     assert solution_2(INPUTS_PATH / "input.txt") == 1662846
 
 
-def _gamma_rate(path):
-    lines = path.read_text().splitlines()
-    cols = list(zip(*lines))
+def _read_report(path: pathlib.Path) -> np.ndarray:
+    """Return the report as a matrix with one row of bits per line"""
+    lines = path.read_bytes().split()
+    bits = np.frombuffer(b"".join(lines), dtype=np.uint8) - ord("0")
+    return bits.reshape(len(lines), -1)
 
-    result = ""
-    for col in cols:
-        counter = collections.Counter(col)
-        if counter["0"] < counter["1"]:
-            result += "1"
-        elif counter["1"] < counter["0"]:
-            result += "0"
-        else:
-            assert False
-    return int(result, 2)
 
+def _to_int(bits: np.ndarray) -> int:
+    return int("".join(map(str, bits.tolist())), 2)
 
-def _epsilon_rate(path):
-    lines = path.read_text().splitlines()
-    cols = list(zip(*lines))
 
-    result = ""
-    for col in cols:
-        counter = collections.Counter(col)
-        if counter["0"] < counter["1"]:
-            result += "0"
-        elif counter["1"] < counter["0"]:
-            result += "1"
-        else:
-            assert False
-    return int(result, 2)
-
-
-def _oxygen_rating(path):
-    lines = path.read_text().splitlines()
-    result = ""
-    for i in range(max(map(len, lines))):
-        col = [line[i] for line in lines]
-        counter = collections.Counter(col)
-        if counter["0"] < counter["1"]:
-            result += "1"
-        elif counter["1"] < counter["0"]:
-            result += "0"
-        else:
-            result += "1"
-        lines = [line for line in lines if line[i] == result[i]]
-        if len(lines) == 1:
-            result = "".join(more_itertools.one(lines))
+def _most_common_bits(report):
+    num_ones = np.count_nonzero(report, axis=0)
+    assert not np.any(2 * num_ones == len(report))
+    return (2 * num_ones > len(report)).astype(np.uint8)
+
+
+def _gamma_rate(report):
+    return _to_int(_most_common_bits(report))
+
+
+def _epsilon_rate(report):
+    return _to_int(1 - _most_common_bits(report))
+
+
+def _sorted_report(report):
+    """Return the lines of the report in lexicographic order"""
+    return report[np.lexsort(report.T[::-1])]
+
+
+def _rating(sorted_report, most_common: bool):
+    lo, hi = 0, len(sorted_report)
+    for i in range(sorted_report.shape[1]):
+        if hi - lo == 1:
             break
-    return int(result, 2)
-
-
-def _carbon_rating(path):
-    lines = path.read_text().splitlines()
-    result = ""
-    for i in range(max(map(len, lines))):
-        col = [line[i] for line in lines]
-        counter = collections.Counter(col)
-        if counter["0"] < counter["1"]:
-            result += "0"
-        elif counter["1"] < counter["0"]:
-            result += "1"
+        split = lo + int(np.searchsorted(sorted_report[lo:hi, i], 1))
+        num_zeros = split - lo
+        num_ones = hi - split
+        if not num_zeros or not num_ones:
+            continue
+        if (num_ones >= num_zeros) == most_common:
+            lo = split
         else:
-            result += "0"
-        lines = [line for line in lines if line[i] == result[i]]
-        if len(lines) == 1:
-            result = "".join(more_itertools.one(lines))
-            break
-    return int(result, 2)
+            hi = split
+    return _to_int(sorted_report[lo])
+
+
+def _oxygen_rating(sorted_report):
+    return _rating(sorted_report, True)
+
+
+def _carbon_rating(sorted_report):
+    return _rating(sorted_report, False)
 
 
 def solution_1(path):
-    return _gamma_rate(path) * _epsilon_rate(path)
+    report = _read_report(path)
+    return _gamma_rate(report) * _epsilon_rate(report)
 
 
 def solution_2(path):
-    return _oxygen_rating(path) * _carbon_rating(path)
+    sorted_report = _sorted_report(_read_report(path))
+    return _oxygen_rating(sorted_report) * _carbon_rating(sorted_report)
@@ -6,6 +6,7 @@ import pathlib
 from typing import Iterable, Iterator, Tuple
 
 import more_itertools
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
@@ -27,6 +28,12 @@ def _read_draw(path: pathlib.Path):
     return [int(num) for num in path.read_text().splitlines()[0].split(",")]
 
 
+def _read_board_array(path: pathlib.Path) -> np.ndarray:
+    """Return all boards as one array of shape `(num_board, 5, 5)`"""
+    text = path.read_text().split("\n", 1)[1]
+    return np.fromstring(text, dtype=np.int64, sep=" ").reshape(-1, 5, 5)
+
+
 def _bingo(board, nums):
     cols = {num: col for (row, col), num in board.items()}
     rows = {num: row for (row, col), num in board.items()}
@@ -39,38 +46,62 @@ def _bingo(board, nums):
     )
 
 
-def _score(board, nums):
-    unmarked = set(board.values()) - set(nums)
-    return sum(unmarked)
-
-
-def solution_1(path):
-    draw = _read_draw(path)
-    boards = _read_boards(path)
-    for i in range(len(draw)):
-        for board in boards:
-            if _bingo(board, draw[:i]):
-                return draw[i - 1] * _score(board, draw[:i])
-
-    raise RuntimeError
-
-
-def solution_2(path):
-    draw = _read_draw(path)
-    boards = _read_boards(path)
-    for i in range(len(draw)):
-        boards = [board for board in boards if not _bingo(board, draw[:i])]
-        if len(boards) == 1:
-            break
-    else:
-        raise RuntimeError
-
-    board = more_itertools.one(boards)
-    for i in range(i, len(draw)):
-        if _bingo(board, draw[:i]):
-            return draw[i - 1] * _score(board, draw[:i])
-
-    raise RuntimeError
+def _wins(boards, draw) -> Iterator[Tuple[int, int]]:
+    """Yield the index and score of every board in the order that they win"""
+    cells = collections.defaultdict(list)
+    for board_num, board in enumerate(boards):
+        for (row, col), num in board.items():
+            cells[num].append((board_num, row, col))
+
+    crossed_rows = collections.Counter()
+    crossed_cols = collections.Counter()
+    unmarked = [sum(board.values()) for board in boards]
+    won = set()
+    for num in draw:
+        for board_num, row, col in cells[num]:
+            crossed_rows[board_num, row] += 1
+            crossed_cols[board_num, col] += 1
+            unmarked[board_num] -= num
+            if board_num in won:
+                continue
+            if crossed_rows[board_num, row] >= 5 or crossed_cols[board_num, col] >= 5:
+                won.add(board_num)
+                yield board_num, num * unmarked[board_num]
+
+
+def _ranked_wins(boards: np.ndarray, draw) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the index and score of every board that wins, in the order they win"""
+    draw = np.asarray(draw)
+    never = len(draw)
+    mark_times = np.full(max(boards.max(), draw.max()) + 1, never)
+    nums, first_times = np.unique(draw, return_index=True)
+    mark_times[nums] = first_times
+    cell_times = mark_times[boards]
+
+    win_times = np.minimum(cell_times.max(axis=1), cell_times.max(axis=2)).min(axis=1)
+    (board_nums,) = np.nonzero(win_times < never)
+    board_nums = board_nums[np.argsort(win_times[board_nums], kind="stable")]
+    win_times = win_times[board_nums]
+
+    unmarked = cell_times[board_nums] > win_times[:, None, None]
+    unmarked_sums = (boards[board_nums] * unmarked).sum(axis=(1, 2))
+    return board_nums, draw[win_times] * unmarked_sums
+
+
+def solution_1(path, vectorized=False):
+    if vectorized:
+        _, scores = _ranked_wins(_read_board_array(path), _read_draw(path))
+        return int(scores[0])
+    _, score = more_itertools.first(_wins(_read_boards(path), _read_draw(path)))
+    return score
+
+
+def solution_2(path, vectorized=False):
+    if vectorized:
+        _, scores = _ranked_wins(_read_board_array(path), _read_draw(path))
+        return int(scores[-1])
+    _, score = more_itertools.last(_wins(_read_boards(path), _read_draw(path)))
+    return score
 
 
 @pytest.mark.parametrize(
@@ -107,8 +138,34 @@ def test_bingo_returns_false(board, draw):
     assert not _bingo(board, draw)
 
 
+def test_wins_in_order():
+    boards = _read_boards(INPUTS_PATH / "example.txt")
+    draw = _read_draw(INPUTS_PATH / "example.txt")
+    assert list(_wins(boards, draw)) == [(2, 4512), (0, 2192), (1, 1924)]
+
+
+def test_ranked_wins_agrees_with_wins():
+    boards = _read_board_array(INPUTS_PATH / "example.txt")
+    draw = _read_draw(INPUTS_PATH / "example.txt")
+    board_nums, scores = _ranked_wins(boards, draw)
+    assert list(zip(board_nums.tolist(), scores.tolist())) == list(
+        _wins(_read_boards(INPUTS_PATH / "example.txt"), draw)
+    )
+
+
+def test_ranked_wins_with_repeated_draws():
+    boards = _read_boards(INPUTS_PATH / "example.txt")
+    draw = _read_draw(INPUTS_PATH / "example.txt")
+    repeated = [draw[0], draw[1], draw[0]] + draw[2:12] + draw[:12] + draw[12:]
+    board_nums, scores = _ranked_wins(
+        _read_board_array(INPUTS_PATH / "example.txt"), repeated
+    )
+    assert list(zip(board_nums.tolist(), scores.tolist())) == list(_wins(boards, draw))
+
+
 def test_example_1():
     assert solution_1(INPUTS_PATH / "example.txt") == 4512
+    assert solution_1(INPUTS_PATH / "example.txt", vectorized=True) == 4512
 
 
 def test_input_1():
@@ -117,6 +174,7 @@ def test_input_1():
 
 def test_example_2():
     assert solution_2(INPUTS_PATH / "example.txt") == 1924
+    assert solution_2(INPUTS_PATH / "example.txt", vectorized=True) == 1924
 
 
 def test_input_2():
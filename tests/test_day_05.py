@@ -1,14 +1,26 @@
 #!/usr/bin/env python3
+import bisect
 import collections
 import dataclasses
 import itertools
 import logging
+import operator
 import pathlib
-from typing import Iterable, Iterator, Tuple
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import more_itertools
+import numpy as np
+import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
+# Every line is horizontal, vertical or diagonal in either direction and is identified
+# by the value of the linear form `a * x + b * y` that is constant along it.
+HORIZONTAL, VERTICAL, RISING, FALLING = LINE_FORMS = ((0, 1), (1, 0), (-1, 1), (1, 1))
+MAX_RASTER_SIZE = 2**26
+
 
 @dataclasses.dataclass(frozen=True)
 class Point:
@@ -90,12 +102,200 @@ def num_zone(lines, include_diagonal):
     return sum(1 if v >= 2 else 0 for v in counts.values())
 
 
+def _read_segments(path: pathlib.Path) -> np.ndarray:
+    """Return the lines as an array with one row of `x1, y1, x2, y2` per line"""
+    nums = re.findall(r"-?\d+", path.read_text())
+    return np.array(nums, dtype=np.int64).reshape(-1, 4)
+
+
+def _num_zone_raster(segments: np.ndarray, include_diagonal: bool) -> int:
+    """Return the number of points covered at least twice using a dense grid"""
+    x1, y1, x2, y2 = segments.T
+    dx = np.sign(x2 - x1)
+    dy = np.sign(y2 - y1)
+    lengths = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1))
+    is_diagonal = (dx != 0) & (dy != 0)
+    assert np.all(~is_diagonal | (np.abs(x2 - x1) == np.abs(y2 - y1)))
+    if not include_diagonal:
+        x1, y1, dx, dy, lengths = (a[~is_diagonal] for a in (x1, y1, dx, dy, lengths))
+    if not len(lengths):
+        return 0
+
+    num_points = lengths + 1
+    starts = np.cumsum(num_points) - num_points
+    steps = np.arange(num_points.sum()) - np.repeat(starts, num_points)
+    xs = np.repeat(x1, num_points) + np.repeat(dx, num_points) * steps
+    ys = np.repeat(y1, num_points) + np.repeat(dy, num_points) * steps
+
+    xs -= xs.min()
+    ys -= ys.min()
+    width = xs.max() + 1
+    counts = np.bincount(ys * width + xs, minlength=width * (ys.max() + 1))
+    return int(np.count_nonzero(counts >= 2))
+
+
+def _key(form, x, y) -> int:
+    a, b = form
+    return a * x + b * y
+
+
+def _param(form, x, y) -> int:
+    return y if form == VERTICAL else x
+
+
+def _point_on(form, key, param) -> Tuple[int, int]:
+    if form == VERTICAL:
+        return key, param
+    a, _ = form
+    return param, key - a * param
+
+
+def _intersection(form1, key1, form2, key2) -> Optional[Tuple[int, int]]:
+    """Return the point where two lines cross if it is a lattice point"""
+    (a1, b1), (a2, b2) = form1, form2
+    det = a1 * b2 - a2 * b1
+    x, x_rem = divmod(key1 * b2 - key2 * b1, det)
+    y, y_rem = divmod(a1 * key2 - a2 * key1, det)
+    if x_rem or y_rem:
+        return None
+    return x, y
+
+
+def _coverage(intervals) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Return the parts covered at least once and at least twice by closed intervals"""
+    events = sorted(
+        itertools.chain(
+            ((lo, 1) for lo, _ in intervals), ((hi + 1, -1) for _, hi in intervals)
+        )
+    )
+    once: List[List[int]] = []
+    twice: List[List[int]] = []
+    depth = 0
+    for param, group in itertools.groupby(events, key=operator.itemgetter(0)):
+        new_depth = depth + sum(delta for _, delta in group)
+        for threshold, result in ((1, once), (2, twice)):
+            if depth < threshold <= new_depth:
+                result.append([param, param])
+            elif new_depth < threshold <= depth:
+                result[-1][1] = param - 1
+        depth = new_depth
+    return [tuple(lo_hi) for lo_hi in once], [tuple(lo_hi) for lo_hi in twice]
+
+
+def _covers(intervals_by_key: Dict[int, List[Tuple[int, int]]], form, x, y) -> bool:
+    intervals = intervals_by_key.get(_key(form, x, y), [])
+    param = _param(form, x, y)
+    i = bisect.bisect_right(intervals, (param, param))
+    return any(lo <= param <= hi for lo, hi in intervals[max(i - 1, 0) : i + 1])
+
+
+def _crossings(form1, intervals_by_key1, form2, intervals_by_key2):
+    """Yield the lattice points where intervals on lines of different forms cross"""
+    insert, query, remove = range(3)
+    events = []
+    for v, intervals in intervals_by_key2.items():
+        for lo, hi in intervals:
+            us = [_key(form1, *_point_on(form2, v, param)) for param in (lo, hi)]
+            events.append((min(us), insert, v))
+            events.append((max(us), remove, v))
+    for u, intervals in intervals_by_key1.items():
+        for lo, hi in intervals:
+            vs = sorted(_key(form2, *_point_on(form1, u, param)) for param in (lo, hi))
+            events.append((u, query, vs))
+    events.sort(key=operator.itemgetter(0, 1))
+
+    active: List[int] = []
+    for u, kind, v in events:
+        if kind == insert:
+            bisect.insort(active, v)
+        elif kind == remove:
+            del active[bisect.bisect_left(active, v)]
+        else:
+            start = bisect.bisect_left(active, v[0])
+            stop = bisect.bisect_right(active, v[1])
+            for crossing_v in active[start:stop]:
+                point = _intersection(form1, u, form2, crossing_v)
+                if point is not None:
+                    yield point
+
+
+def _num_zone_sparse(segments: np.ndarray, include_diagonal: bool) -> int:
+    """Return the number of points covered at least twice without enumerating points"""
+    grouped = collections.defaultdict(list)
+    for x1, y1, x2, y2 in segments.tolist():
+        form = more_itertools.first(
+            form for form in LINE_FORMS if _key(form, x1, y1) == _key(form, x2, y2)
+        )
+        if form in (RISING, FALLING) and not include_diagonal:
+            continue
+        params = sorted([_param(form, x1, y1), _param(form, x2, y2)])
+        grouped[form, _key(form, x1, y1)].append(tuple(params))
+
+    once = {form: {} for form in LINE_FORMS}
+    twice = {form: {} for form in LINE_FORMS}
+    for (form, key), intervals in grouped.items():
+        once[form][key], twice[form][key] = _coverage(intervals)
+
+    crossings = set()
+    for form1, form2 in itertools.combinations(LINE_FORMS, 2):
+        crossings.update(_crossings(form1, once[form1], form2, once[form2]))
+
+    num_twice = sum(
+        hi - lo + 1
+        for intervals_by_key in twice.values()
+        for intervals in intervals_by_key.values()
+        for lo, hi in intervals
+    )
+    num_counted_twice = sum(
+        _covers(twice[form], form, x, y) for x, y in crossings for form in LINE_FORMS
+    )
+    return num_twice + len(crossings) - num_counted_twice
+
+
+def _num_zone_arrays(segments: np.ndarray, include_diagonal: bool) -> int:
+    if not len(segments):
+        return 0
+    xs, ys = segments[:, 0::2], segments[:, 1::2]
+    size = (int(xs.max()) - int(xs.min()) + 1) * (int(ys.max()) - int(ys.min()) + 1)
+    if size <= MAX_RASTER_SIZE:
+        return _num_zone_raster(segments, include_diagonal)
+    return _num_zone_sparse(segments, include_diagonal)
+
+
 def solution_1(path):
-    return num_zone(_read_lines(path), False)
+    return _num_zone_arrays(_read_segments(path), False)
 
 
 def solution_2(path):
-    return num_zone(_read_lines(path), True)
+    return _num_zone_arrays(_read_segments(path), True)
+
+
+@pytest.mark.parametrize("include_diagonal", [False, True])
+def test_raster_agrees_with_counter(include_diagonal):
+    path = INPUTS_PATH / "example.txt"
+    expected = num_zone(_read_lines(path), include_diagonal)
+    assert _num_zone_raster(_read_segments(path), include_diagonal) == expected
+
+
+@pytest.mark.parametrize("include_diagonal", [False, True])
+def test_sparse_agrees_with_counter(include_diagonal):
+    path = INPUTS_PATH / "example.txt"
+    expected = num_zone(_read_lines(path), include_diagonal)
+    assert _num_zone_sparse(_read_segments(path), include_diagonal) == expected
+
+
+def test_sparse_on_huge_coordinates():
+    segments = np.array(
+        [
+            [-(10**9), 0, 10**9, 0],
+            [0, -(10**9), 0, 10**9],
+            [-5, -5, 10**9, 10**9],
+            [10, 0, 10**9, 0],
+        ]
+    )
+    num_overlapping = 10**9 - 10 + 1
+    num_crossing = 1
+    assert _num_zone_sparse(segments, True) == num_overlapping + num_crossing
 
 
 def test_example_1():
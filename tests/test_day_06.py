@@ -1,11 +1,20 @@
 #!/usr/bin/env python3
 import collections
+import functools
 import logging
 import pathlib
+from typing import Optional, Tuple
+
+import numpy as np
+import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
+NUM_TIMER = 9
+
+Matrix = Tuple[Tuple[int, ...], ...]
+
 
 def _read_population(path: pathlib.Path):
     return collections.Counter(int(n) for n in path.read_text().split(","))
@@ -32,8 +41,76 @@ def _size(population):
     return sum(population.values())
 
 
-def solution_1(path, num_day=80):
-    return _size(_simulate(_read_population(path), num_day))
+def _transition() -> Matrix:
+    """Return the matrix that maps the population on one day to the next"""
+    result = [[0] * NUM_TIMER for _ in range(NUM_TIMER)]
+    for k in range(1, NUM_TIMER):
+        result[k - 1][k] = 1
+    result[6][0] = 1
+    result[8][0] = 1
+    return tuple(map(tuple, result))
+
+
+def _matmul(left: Matrix, right: Matrix, modulus: Optional[int]) -> Matrix:
+    result = tuple(
+        tuple(sum(a * b for a, b in zip(row, col)) for col in zip(*right))
+        for row in left
+    )
+    if modulus is None:
+        return result
+    return tuple(tuple(v % modulus for v in row) for row in result)
+
+
+@functools.lru_cache(maxsize=None)
+def _transition_power(exponent: int, modulus: Optional[int]) -> Matrix:
+    """Return the transition raised to `2 ** exponent`"""
+    if not exponent:
+        return _transition()
+    half = _transition_power(exponent - 1, modulus)
+    return _matmul(half, half, modulus)
+
+
+def _simulate_fast(population, num_day, modulus=None):
+    """Return the population after `num_day` days in `O(log(num_day))` steps"""
+    vector = [population.get(k, 0) for k in range(NUM_TIMER)]
+    for exponent in range(num_day.bit_length()):
+        if num_day >> exponent & 1:
+            matrix = _transition_power(exponent, modulus)
+            vector = [sum(a * b for a, b in zip(row, vector)) for row in matrix]
+            if modulus is not None:
+                vector = [v % modulus for v in vector]
+    return collections.Counter(dict(enumerate(vector)))
+
+
+def _read_populations(path: pathlib.Path, dtype=np.int64) -> np.ndarray:
+    """Return the number of fish per timer for every school, one school per line"""
+    lines = path.read_text().splitlines()
+    timers = [np.fromstring(line, dtype=np.int64, sep=",") for line in lines]
+    schools = np.repeat(np.arange(len(lines)), [len(t) for t in timers])
+    result = np.zeros((len(lines), NUM_TIMER), dtype=dtype)
+    np.add.at(result, (schools, np.concatenate(timers)), 1)
+    return result
+
+
+def _batch_sizes(populations: np.ndarray, num_days) -> np.ndarray:
+    """Return the size of every school after every number of days"""
+    result = np.empty((len(populations), len(num_days)), dtype=populations.dtype)
+    state = populations.copy()
+    day = 0
+    for i in np.argsort(num_days, kind="stable"):
+        for _ in range(num_days[i] - day):
+            state = np.roll(state, -1, axis=1)
+            state[:, 6] += state[:, 8]
+        day = num_days[i]
+        result[:, i] = state.sum(axis=1)
+    return result
+
+
+def solution_1(path, num_day=80, modulus=None):
+    size = _size(_simulate_fast(_read_population(path), num_day, modulus))
+    if modulus is None:
+        return size
+    return size % modulus
 
 
 def solution_2(path):
@@ -44,6 +121,34 @@ def test_example_1_day_18():
     assert solution_1(INPUTS_PATH / "example.txt", 18) == 26
 
 
+@pytest.mark.parametrize("num_day", [0, 1, 2, 7, 9, 18, 80, 100])
+def test_simulate_fast_agrees_with_simulate(num_day):
+    population = _read_population(INPUTS_PATH / "example.txt")
+    expected = collections.Counter(_simulate(population, num_day))
+    assert _simulate_fast(population, num_day) == expected
+
+
+def test_batch_sizes_agrees_with_solution():
+    example = _read_populations(INPUTS_PATH / "example.txt")
+    populations = np.concatenate([example, np.eye(NUM_TIMER, dtype=np.int64)])
+    num_days = [256, 18, 0, 80, 18]
+    actual = _batch_sizes(populations, num_days)
+    assert actual.shape == (1 + NUM_TIMER, len(num_days))
+    assert actual[0].tolist() == [26984457539, 26, 5, 5934, 26]
+    for population, sizes in zip(populations, actual):
+        counter = collections.Counter(dict(enumerate(population.tolist())))
+        expected = [_size(_simulate_fast(counter, num_day)) for num_day in num_days]
+        assert sizes.tolist() == expected
+
+
+def test_example_1_modulo():
+    modulus = 10**9 + 7
+    num_day = 10**4
+    actual = solution_1(INPUTS_PATH / "example.txt", num_day, modulus)
+    expected = solution_1(INPUTS_PATH / "example.txt", num_day) % modulus
+    assert actual == expected
+
+
 def test_example_1():
     assert solution_1(INPUTS_PATH / "example.txt") == 5934
 
@@ -3,6 +3,9 @@ import collections
 import logging
 import pathlib
 
+import numpy as np
+import pytest
+
 logger = logging.getLogger(__name__)
 
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
@@ -20,16 +23,97 @@ def _cost2(population, n):
     return sum(abs(n - k) * (abs(n - k) + 1) // 2 * v for k, v in population.items())
 
 
+def _cost_curves(population):
+    """Return the linear and triangular costs of aligning at every position"""
+    positions = np.arange(max(population) + 1, dtype=np.int64)
+    counts = np.zeros_like(positions)
+    counts[list(population)] = list(population.values())
+
+    num_left = np.cumsum(counts)
+    sum_left = np.cumsum(counts * positions)
+    num_right = num_left[-1] - num_left
+    sum_right = sum_left[-1] - sum_left
+    linear = positions * num_left - sum_left + sum_right - positions * num_right
+
+    squared = (
+        positions**2 * num_left[-1]
+        - 2 * positions * sum_left[-1]
+        + np.sum(counts * positions**2)
+    )
+    return linear, (squared + linear) // 2
+
+
 def _min_cost(population, cost):
-    return min(cost(population, i) for i in range(max(population)))
+    return min(cost(population, i) for i in range(min(population), max(population) + 1))
+
+
+def _weighted_median(population):
+    total = sum(population.values())
+    seen = 0
+    for k in sorted(population):
+        seen += population[k]
+        if 2 * seen >= total:
+            return k
+    raise ValueError("Population is empty")
+
+
+def _min_cost_convex(population, cost):
+    """Return the minimum of a cost that is convex in the position"""
+    lo, hi = min(population), max(population)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if cost(population, mid) <= cost(population, mid + 1):
+            hi = mid
+        else:
+            lo = mid + 1
+    return cost(population, lo)
+
+
+def _min_cost1(population):
+    """Return the minimum linear cost, which is attained at the weighted median"""
+    return _cost1(population, _weighted_median(population))
+
+
+def _min_cost2(population):
+    total = sum(population.values())
+    floor, remainder = divmod(sum(k * v for k, v in population.items()), total)
+    candidates = [floor, floor + 1] if remainder else [floor]
+    return min(_cost2(population, n) for n in candidates)
 
 
 def solution_1(path):
-    return _min_cost(_read_population(path), _cost1)
+    return _min_cost1(_read_population(path))
 
 
 def solution_2(path):
-    return _min_cost(_read_population(path), _cost2)
+    return _min_cost2(_read_population(path))
+
+
+@pytest.mark.parametrize("cost, curve_index", [(_cost1, 0), (_cost2, 1)])
+def test_cost_curves_agree_with_costs(cost, curve_index):
+    population = _read_population(INPUTS_PATH / "example.txt")
+    expected = [cost(population, n) for n in range(max(population) + 1)]
+    assert _cost_curves(population)[curve_index].tolist() == expected
+
+
+@pytest.mark.parametrize("cost", [_cost1, _cost2])
+def test_min_cost_convex_agrees_with_exhaustive(cost):
+    population = _read_population(INPUTS_PATH / "example.txt")
+    assert _min_cost_convex(population, cost) == _min_cost(population, cost)
+
+
+@pytest.mark.parametrize(
+    "population",
+    [
+        collections.Counter({0: 1}),
+        collections.Counter({0: 1, 1: 1}),
+        collections.Counter({0: 5, 1000: 1}),
+        collections.Counter({0: 1, 10**12: 3}),
+    ],
+)
+def test_direct_min_costs_agree_with_convex(population):
+    assert _min_cost1(population) == _min_cost_convex(population, _cost1)
+    assert _min_cost2(population) == _min_cost_convex(population, _cost2)
 
 
 def test_example_1():
@@ -1,11 +1,15 @@
 #!/usr/bin/env python3
+import collections
 import dataclasses
+import functools
 import itertools
 import logging
+import operator
 import pathlib
-from typing import Tuple
+from typing import Dict, Iterable, Tuple
 
 import more_itertools
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
@@ -44,6 +48,83 @@ LETTERS = {
 }
 
 
+SEGMENTS = "abcdefg"
+UNUSED = 0xFF
+
+
+def _mask(pattern: Iterable[str]) -> int:
+    """Return the pattern as a 7-bit mask with one bit per segment"""
+    return functools.reduce(operator.or_, (1 << SEGMENTS.index(c) for c in pattern), 0)
+
+
+def _signature(masks: Iterable[int]) -> int:
+    """Return a key that is the same for every ordering of the same patterns"""
+    return functools.reduce(operator.or_, (1 << mask for mask in masks), 0)
+
+
+def _decoding_tables() -> Dict[int, bytes]:
+    """Return, for every possible wiring, a table from pattern mask to digit"""
+    result = {}
+    for wiring in itertools.permutations(range(len(SEGMENTS))):
+        table = bytearray([UNUSED] * 2 ** len(SEGMENTS))
+        for digit, letters in LETTERS.items():
+            wired = (SEGMENTS[wiring[SEGMENTS.index(c)]] for c in letters)
+            table[_mask(wired)] = digit
+        signature = _signature(i for i, digit in enumerate(table) if digit != UNUSED)
+        result[signature] = bytes(table)
+    assert len(result) == 5040
+    return result
+
+
+DECODING_TABLES = _decoding_tables()
+
+
+def _decoded_by_table(entry: Entry) -> int:
+    table = DECODING_TABLES[_signature(map(_mask, entry.train_digits))]
+    result = 0
+    for display in entry.test_digits:
+        result = result * 10 + table[_mask(display)]
+    return result
+
+
+def _digits_by_score() -> np.ndarray:
+    """Return a table from the sum of the frequencies of a digit's segments to digit"""
+    frequencies = collections.Counter(itertools.chain.from_iterable(LETTERS.values()))
+    scores = {
+        sum(frequencies[c] for c in letters): digit
+        for digit, letters in LETTERS.items()
+    }
+    assert len(scores) == len(LETTERS)
+    result = np.full(max(scores) + 1, UNUSED, dtype=np.uint8)
+    result[list(scores)] = list(scores.values())
+    return result
+
+
+DIGITS_BY_SCORE = _digits_by_score()
+
+
+def _read_masks(path: pathlib.Path) -> np.ndarray:
+    """Return the masks of the ten train and four test patterns of every entry"""
+    data = np.frombuffer(path.read_bytes(), dtype=np.uint8)
+    is_segment = (ord(SEGMENTS[0]) <= data) & (data <= ord(SEGMENTS[-1]))
+    is_start = is_segment & ~np.concatenate([[False], is_segment[:-1]])
+    pattern_nums = np.cumsum(is_start)[is_segment] - 1
+    bits = np.left_shift(1, data[is_segment] - ord(SEGMENTS[0]))
+    masks = np.zeros(np.count_nonzero(is_start), dtype=np.uint8)
+    np.bitwise_or.at(masks, pattern_nums, bits.astype(np.uint8))
+    return masks.reshape(-1, 14)
+
+
+def _decoded_by_frequency(masks: np.ndarray) -> np.ndarray:
+    """Return the displayed value of every entry"""
+    bits = np.unpackbits(masks[..., None], axis=-1, bitorder="little")
+    bits = bits[..., : len(SEGMENTS)].astype(np.int64)
+    frequencies = bits[:, :10].sum(axis=1)
+    scores = np.einsum("nds,ns->nd", bits[:, 10:], frequencies)
+    digits = DIGITS_BY_SCORE[scores].astype(np.int64)
+    return digits @ np.array([1000, 100, 10, 1])
+
+
 def _key(digits):
     by_length = more_itertools.map_reduce(
         digits,
@@ -104,8 +185,7 @@ def solution_1(path):
 
 
 def solution_2(path):
-    entries = _read_entries(path)
-    return sum(_cracked_and_decoded(entry) for entry in entries)
+    return int(_decoded_by_frequency(_read_masks(path)).sum())
 
 
 def test_decode_original():
@@ -125,6 +205,14 @@ def test_decode_original():
 def test_decode_entry(entry, expected):
     key = _key(entry.train_digits)
     assert _decoded(entry.test_digits, key) == expected
+    assert _cracked_and_decoded(entry) == expected
+    assert _decoded_by_table(entry) == expected
+
+
+def test_decoded_by_frequency():
+    masks = _read_masks(INPUTS_PATH / "example.txt")
+    expected = [8394, 9781, 1197, 9361, 4873, 8418, 4548, 1625, 8717, 4315]
+    assert _decoded_by_frequency(masks).tolist() == expected
 
 
 def test_example_1():
@@ -2,9 +2,10 @@
 import logging
 import pathlib
 import sys
+import tracemalloc
 
-import more_itertools
 import numpy as np
+import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
@@ -18,65 +19,137 @@ def read_height_map(path: pathlib.Path):
     )
 
 
-def _row_mins(heights):
-    results = np.zeros_like(heights)
-    for i in range(heights.shape[0]):
-        src = heights[i, :]
-        dst = results[i, :]
-        if src[0] < src[1]:
-            dst[0] = 1
-        if src[-1] < src[-2]:
-            dst[-1] = 1
-        for j, (a, b, c) in enumerate(more_itertools.triplewise(src), 1):
-            if b < a and b < c:
-                dst[j] = 1
-    return results
+NEIGHBORHOODS = {
+    4: [(-1, 0), (0, -1), (0, 1), (1, 0)],
+    8: [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)],
+}
+# Higher than any height so that cells on the border are compared only to real cells
+PADDING = 10
+
+
+def _is_low(padded, num_neighbor):
+    """Return which cells inside a one cell wide border are lower than all neighbors"""
+    h, w = padded.shape[0] - 2, padded.shape[1] - 2
+    center = padded[1:-1, 1:-1]
+    result = np.ones(center.shape, dtype=bool)
+    for dr, dc in NEIGHBORHOODS[num_neighbor]:
+        result &= center < padded[1 + dr : 1 + dr + h, 1 + dc : 1 + dc + w]
+    return result
+
+
+def _risk_sum(heights, num_neighbor=4):
+    padded = np.pad(heights, 1, constant_values=PADDING)
+    return int(np.sum(heights[_is_low(padded, num_neighbor)] + 1))
+
+
+def _rows(flat, width, start, stop, newline=b"\n"):
+    """Return rows `start` to `stop` of a memory mapped height map"""
+    stride = width + len(newline)
+    chunk = flat[start * stride : stop * stride]
+    if len(chunk) < (stop - start) * stride:
+        chunk = np.append(chunk, np.frombuffer(newline, dtype=np.uint8))
+    if len(chunk) != (stop - start) * stride:
+        raise ValueError("Expected rows of equal width")
+    rows = chunk.reshape(stop - start, stride)
+    if np.any(rows[:, width:] != np.frombuffer(newline, dtype=np.uint8)):
+        raise ValueError("Expected rows of equal width")
+    result = rows[:, :width] - ord("0")
+    if np.any(result > 9):
+        raise ValueError("Expected only digits in height map")
+    return result
+
+
+def _risk_sum_banded(path: pathlib.Path, num_neighbor=4, band_size=1024):
+    """Return the risk sum reading only `band_size` rows plus two halo rows at a time"""
+    with path.open("rb") as f:
+        line = f.readline()
+    newline = b"\r\n" if line.endswith(b"\r\n") else b"\n"
+    width = len(line.rstrip(b"\r\n"))
+    if not width:
+        return 0
+    flat = np.memmap(path, dtype=np.uint8, mode="r")
+    stride = width + len(newline)
+    if len(flat) % stride and (len(flat) + len(newline)) % stride:
+        raise ValueError("Expected rows of equal width")
+    num_row = (len(flat) + len(newline)) // stride
+    result = 0
+    for start in range(0, num_row, band_size):
+        stop = min(start + band_size, num_row)
+        halo_start, halo_stop = max(start - 1, 0), min(stop + 1, num_row)
+        padded = np.full((stop - start + 2, width + 2), PADDING, dtype=np.int16)
+        padded[halo_start - start + 1 : halo_stop - start + 1, 1:-1] = _rows(
+            flat, width, halo_start, halo_stop, newline
+        )
+        heights = padded[1:-1, 1:-1]
+        result += int(np.sum(heights[_is_low(padded, num_neighbor)] + 1))
+    return result
 
 
 def solution_1(path):
-    heights = read_height_map(path)
-    row_mins = _row_mins(heights)
-    col_mins = _row_mins(heights.T).T
-    four_mins = row_mins * col_mins
-    risk = four_mins * (heights + 1)
-    return np.sum(risk)
+    return _risk_sum_banded(path)
+
+
+def _compressed(parents):
+    while True:
+        grandparents = parents[parents]
+        if np.array_equal(grandparents, parents):
+            return parents
+        parents = grandparents
+
+
+def _basin_roots(heights):
+    """Return, for every cell, the index of a representative cell of its basin"""
+    assert heights.size < 2**31
+    indices = np.arange(heights.size, dtype=np.int32).reshape(heights.shape)
+    is_basin = heights != 9
+    edges = [
+        (indices[:, :-1][is_basin[:, :-1] & is_basin[:, 1:]], 1),
+        (indices[:-1, :][is_basin[:-1, :] & is_basin[1:, :]], heights.shape[1]),
+    ]
+    del is_basin
+
+    parents = indices.ravel()
+    del indices
+    while any(len(src) for src, _ in edges):
+        for i, (src, offset) in enumerate(edges):
+            unmerged = parents[src] != parents[src + offset]
+            src = src[unmerged]
+            del unmerged
+            edges[i] = src, offset
+            if not len(src):
+                continue
+            src_roots = parents[src]
+            dst_roots = parents[src + offset]
+            np.minimum.at(
+                parents,
+                np.maximum(src_roots, dst_roots),
+                np.minimum(src_roots, dst_roots),
+            )
+            del src_roots, dst_roots
+            parents = _compressed(parents)
+    return parents.reshape(heights.shape)
+
+
+def _basin_sizes(heights):
+    roots = _basin_roots(heights)[heights != 9]
+    sizes = np.bincount(roots)
+    return np.sort(sizes[sizes > 0])[::-1]
+
+
+def _read_height_array(path: pathlib.Path):
+    data = path.read_bytes()
+    newline = b"\r\n" if b"\r\n" in data else b"\n"
+    width = data.find(newline)
+    if width == -1:
+        width = len(data)
+    flat = np.frombuffer(data, dtype=np.uint8)
+    stride = width + len(newline)
+    return _rows(flat, width, 0, (len(flat) + len(newline)) // stride, newline)
 
 
 def solution_2(path):
-    heights = read_height_map(path)
-    h, w = heights.shape
-    h2, w2 = h + 2, w + 2
-    heights2 = np.full((h2, w2), 9)
-    heights2[1:-1, 1:-1] = heights
-    walls2 = (heights2 == 9) * 1
-    basins2 = np.arange(h2 * w2).reshape(walls2.shape) * (walls2 == 0)
-    making_progress = True
-    while making_progress:
-        making_progress = False
-        if not np.isin(0, basins2):
-            break
-
-        for r in range(1, h + 1):
-            for c in range(1, w + 1):
-                if walls2[r, c] == 1:
-                    continue
-
-                b = max(
-                    basins2[r, c],
-                    basins2[r, c - 1],
-                    basins2[r, c + 1],
-                    basins2[r - 1, c],
-                    basins2[r + 1, c],
-                )
-                if b and basins2[r, c] != b:
-                    making_progress = True
-                    basins2[r, c] = b
-
-    basins_nums = set(int(x) for x in np.nditer(basins2))
-    basins_nums.remove(0)
-    by_num = {n: np.sum(basins2 == n) for n in basins_nums}
-    sizes = sorted(by_num.values(), reverse=True)
-    return sizes[0] * sizes[1] * sizes[2]
+    sizes = _basin_sizes(_read_height_array(path))
+    return int(np.prod(sizes[:3]))
 
 
 def test_example_1():
@@ -85,12 +158,84 @@ def test_example_1():
     assert actual == expected
 
 
+@pytest.mark.parametrize("num_neighbor", [4, 8])
+@pytest.mark.parametrize("band_size", [1, 2, 3, 1024])
+def test_risk_sum_banded_agrees_with_risk_sum(num_neighbor, band_size):
+    path = INPUTS_PATH / "example.txt"
+    expected = _risk_sum(read_height_map(path), num_neighbor)
+    assert _risk_sum_banded(path, num_neighbor, band_size) == expected
+
+
+def test_risk_sum_banded_without_trailing_newline(tmp_path):
+    path = tmp_path / "heights.txt"
+    path.write_text("2199943210")
+    expected = _risk_sum(np.array([[int(c) for c in "2199943210"]]))
+    assert _risk_sum_banded(path) == expected == 3
+
+
+def test_risk_sum_banded_with_crlf(tmp_path):
+    expected = _risk_sum(read_height_map(INPUTS_PATH / "example.txt"))
+    path = tmp_path / "heights.txt"
+    path.write_bytes((INPUTS_PATH / "example.txt").read_bytes().replace(b"\n", b"\r\n"))
+    assert _risk_sum_banded(path, band_size=2) == expected
+
+
+@pytest.mark.parametrize(
+    "data", [b"219\n38\n987\n", b"219\n3987\n98\n", b"219\n3 8\n", b"219\n398\n98"]
+)
+def test_risk_sum_banded_rejects_malformed_rows(tmp_path, data):
+    path = tmp_path / "heights.txt"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        _risk_sum_banded(path, band_size=1)
+
+
+def test_risk_sum_banded_memory_is_bounded_by_band(tmp_path):
+    rng = np.random.default_rng(0)
+    heights = rng.integers(0, 10, size=(2000, 1000), dtype=np.uint8)
+    path = tmp_path / "heights.txt"
+    path.write_bytes(b"\n".join(bytes(row + ord("0")) for row in heights) + b"\n")
+
+    tracemalloc.start()
+    try:
+        actual = _risk_sum_banded(path, band_size=20)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert actual == _risk_sum(heights.astype(np.int64))
+    assert peak < path.stat().st_size / 8
+
+
 def test_input_1():
     actual = solution_1(INPUTS_PATH / "input.txt")
     expected = 526
     assert actual == expected
 
 
+def test_read_height_array():
+    path = INPUTS_PATH / "example.txt"
+    assert _read_height_array(path).tolist() == read_height_map(path).tolist()
+
+
+def test_read_height_array_with_crlf(tmp_path):
+    expected = read_height_map(INPUTS_PATH / "example.txt")
+    path = tmp_path / "heights.txt"
+    path.write_bytes((INPUTS_PATH / "example.txt").read_bytes().replace(b"\n", b"\r\n"))
+    assert _read_height_array(path).tolist() == expected.tolist()
+
+
+def test_read_height_array_rejects_non_digits(tmp_path):
+    path = tmp_path / "heights.txt"
+    path.write_bytes(b"219\n3x8\n")
+    with pytest.raises(ValueError):
+        _read_height_array(path)
+
+
+def test_basin_sizes():
+    heights = read_height_map(INPUTS_PATH / "example.txt")
+    assert _basin_sizes(heights).tolist() == [14, 9, 9, 3]
+
+
 def test_example_2():
     actual = solution_2(INPUTS_PATH / "example.txt")
     expected = 1134
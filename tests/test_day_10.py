@@ -1,7 +1,15 @@
 #!/usr/bin/env python3
+import concurrent.futures
+import dataclasses
+import itertools
 import logging
+import os
 import pathlib
+import random
 import statistics
+from typing import List, Optional, Sequence, Tuple
+
+import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
@@ -29,42 +37,162 @@ AUTOCOMPLETE_POINTS = {
 }
 
 
-def parse_line(line):
-    stack = []
-    for c in line:
-        if c in OPEN2CLOSE:
-            stack.append(c)
-        elif c in CLOSE2OPEN:
-            if stack[-1] != CLOSE2OPEN[c]:
-                return stack, c
+# Opening brackets translate to their kind, 1 to 4, closing brackets to their kind
+# with the high bit set and anything else to 0.
+CLOSING = 0x80
+INVALID = 0
+
+
+def _code_table() -> bytes:
+    result = bytearray([INVALID] * 256)
+    for kind, (opening, closing) in enumerate(OPEN2CLOSE.items(), 1):
+        result[ord(opening)] = kind
+        result[ord(closing)] = CLOSING | kind
+    return bytes(result)
+
+
+CODES = _code_table()
+CLOSE_BY_KIND = " " + "".join(OPEN2CLOSE.values())
+
+CORRUPTED = "corrupted"
+INCOMPLETE = "incomplete"
+COMPLETE = "complete"
+
+
+@dataclasses.dataclass(frozen=True)
+class Validation:
+    status: str
+    illegal: Optional[str] = None
+    # Syntax error score if corrupted, else autocomplete score
+    score: int = 0
+
+
+def _validate(line: bytes) -> Validation:
+    stack = bytearray()
+    for code in line.translate(CODES):
+        if not code & CLOSING:
+            assert code != INVALID
+            stack.append(code)
+        elif stack and stack[-1] == code ^ CLOSING:
             stack.pop()
         else:
-            assert False
-    return stack, None
+            illegal = CLOSE_BY_KIND[code ^ CLOSING]
+            return Validation(CORRUPTED, illegal, POINTS[illegal])
+
+    if not stack:
+        return Validation(COMPLETE)
+
+    score = 0
+    for kind in reversed(stack):
+        score = score * 5 + AUTOCOMPLETE_POINTS[CLOSE_BY_KIND[kind]]
+    return Validation(INCOMPLETE, None, score)
+
+
+def _line_starts(path: pathlib.Path, num_chunk: int) -> List[int]:
+    size = path.stat().st_size
+    result = [0]
+    with path.open("rb") as f:
+        for i in range(1, num_chunk):
+            f.seek(size * i // num_chunk)
+            f.readline()
+            if result[-1] < f.tell() < size:
+                result.append(f.tell())
+    return result
 
 
-def autocomplete_score(stack):
-    result = 0
-    for c in stack[::-1]:
-        result *= 5
-        result += AUTOCOMPLETE_POINTS[OPEN2CLOSE[c]]
-    return result
+def _chunk_scores(path: pathlib.Path, start: int, stop: int) -> Tuple[int, List[int]]:
+    """Return the total syntax error score and every autocomplete score of a chunk"""
+    syntax_error_score = 0
+    autocomplete_scores = []
+    with path.open("rb") as f:
+        f.seek(start)
+        position = start
+        while position < stop:
+            line = f.readline()
+            position += len(line)
+            validation = _validate(line.rstrip(b"\r\n"))
+            if validation.status == CORRUPTED:
+                syntax_error_score += validation.score
+            elif validation.status == INCOMPLETE:
+                autocomplete_scores.append(validation.score)
+    return syntax_error_score, autocomplete_scores
+
+
+def _scores(path: pathlib.Path, num_process=1) -> Tuple[int, List[int]]:
+    if num_process == 1:
+        return _chunk_scores(path, 0, path.stat().st_size)
+
+    num_process = num_process or os.cpu_count()
+    starts = _line_starts(path, num_process)
+    stops = starts[1:] + [path.stat().st_size]
+    with concurrent.futures.ProcessPoolExecutor(num_process) as executor:
+        syntax_error_scores, autocomplete_scores = zip(
+            *executor.map(_chunk_scores, itertools.repeat(path), starts, stops)
+        )
+    return sum(syntax_error_scores), list(itertools.chain(*autocomplete_scores))
+
+
+def _select(values: Sequence[int], k: int) -> int:
+    """Return the `k`th smallest value in expected linear time"""
+    assert 0 <= k < len(values)
+    while True:
+        pivot = random.choice(values)
+        lower = [v for v in values if v < pivot]
+        num_equal = sum(1 for v in values if v == pivot)
+        if k < len(lower):
+            values = lower
+        elif k < len(lower) + num_equal:
+            return pivot
+        else:
+            k -= len(lower) + num_equal
+            values = [v for v in values if v > pivot]
+
+
+def _median(values: Sequence[int]):
+    """Return the same median as `statistics.median` without sorting"""
+    if not values:
+        raise statistics.StatisticsError("no median for empty data")
+    half, odd = divmod(len(values), 2)
+    if odd:
+        return _select(values, half)
+    return (_select(values, half - 1) + _select(values, half)) / 2
+
+
+def solution_1(path, num_process=1):
+    syntax_error_score, _ = _scores(path, num_process)
+    return syntax_error_score
+
+
+def solution_2(path, num_process=1):
+    _, autocomplete_scores = _scores(path, num_process)
+    return _median(autocomplete_scores)
+
+
+@pytest.mark.parametrize(
+    "line, expected",
+    [
+        (b"[({(<(())[]>[[{[]{<()<>>", Validation(INCOMPLETE, None, 288957)),
+        (b"{([(<{}[<>[]}>{[]{[(<()>", Validation(CORRUPTED, "}", 1197)),
+        (b"<([]){()}[{}])", Validation(CORRUPTED, ")", 3)),
+        (b"{()()()}", Validation(COMPLETE)),
+    ],
+)
+def test_validate(line, expected):
+    assert _validate(line) == expected
 
 
-def solution_1(path):
-    return sum(
-        POINTS.get(parse_line(line)[1], 0) for line in path.read_text().splitlines()
-    )
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("num_value", [1, 2, 5, 100])
+def test_median_agrees_with_statistics(seed, num_value):
+    rng = random.Random(seed)
+    values = [rng.randrange(10) for _ in range(num_value)]
+    assert _median(values) == statistics.median(values)
 
 
-def solution_2(path):
-    incomplete = [
-        parse_line(line)[0]
-        for line in path.read_text().splitlines()
-        if parse_line(line)[1] is None
-    ]
-    scores = [autocomplete_score(stack) for stack in incomplete]
-    return statistics.median(scores)
+def test_example_in_parallel():
+    path = INPUTS_PATH / "example.txt"
+    assert solution_1(path, num_process=3) == 26397
+    assert solution_2(path, num_process=4) == 288957
 
 
 def test_example_1():
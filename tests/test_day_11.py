@@ -1,15 +1,20 @@
 #!/usr/bin/env python3
+import dataclasses
 import itertools
 import logging
 import operator
 import pathlib
 import textwrap
+from typing import List, Optional
 
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
 INPUTS_PATH = pathlib.Path(__file__).with_suffix("")
 
+OFFSETS = [(-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)]
+
 
 def _fmt_energy_levels(energy_levels, max_row, max_col):
     return "\n".join(
@@ -81,20 +86,110 @@ def _simulate(energy_levels, num_step):
     return sum(_step(energy_levels, max_row, max_col) for _ in range(num_step))
 
 
+def _read_energy_array(path: pathlib.Path) -> np.ndarray:
+    lines = path.read_bytes().split()
+    return (np.frombuffer(b"".join(lines), dtype=np.int8) - ord("0")).reshape(
+        len(lines), -1
+    )
+
+
+def _neighbor_table(num_row, num_col) -> np.ndarray:
+    """Return the flat index of every neighbor of every cell, or of a sentinel cell"""
+    num_cell = num_row * num_col
+    rows, cols = np.divmod(np.arange(num_cell), num_col)
+    result = np.full((num_cell, len(OFFSETS)), num_cell)
+    for i, (dr, dc) in enumerate(OFFSETS):
+        r, c = rows + dr, cols + dc
+        valid = (0 <= r) & (r < num_row) & (0 <= c) & (c < num_col)
+        result[valid, i] = (r * num_col + c)[valid]
+    return result
+
+
+def _step_array(energy_levels, neighbors):
+    """Advance flat energy levels, with a trailing sentinel, by one step in place"""
+    energy_levels += 1
+    queue = np.flatnonzero(energy_levels > 9)
+    flashed = np.zeros(len(energy_levels), dtype=bool)
+    flashed[-1] = True
+    flashed[queue] = True
+    while len(queue):
+        touched = neighbors[queue].ravel()
+        np.add.at(energy_levels, touched, 1)
+        touched = np.unique(touched)
+        queue = touched[(energy_levels[touched] > 9) & ~flashed[touched]]
+        flashed[queue] = True
+
+    energy_levels[flashed] = 0
+    return int(np.count_nonzero(flashed)) - 1
+
+
+def _simulate_array(energy_levels, num_step):
+    """Advance the energy levels by `num_step` steps in place and count flashes"""
+    neighbors = _neighbor_table(*energy_levels.shape)
+    flat = np.append(energy_levels.ravel(), np.int8(0))
+    result = sum(_step_array(flat, neighbors) for _ in range(num_step))
+    energy_levels[...] = flat[:-1].reshape(energy_levels.shape)
+    return result
+
+
+def _packed(flat) -> bytes:
+    """Return the energy levels, without the sentinel, packed two per byte"""
+    cells = flat[:-1].astype(np.uint8)
+    if len(cells) % 2:
+        cells = np.append(cells, np.uint8(0))
+    return (cells[0::2] << 4 | cells[1::2]).tobytes()
+
+
+@dataclasses.dataclass(frozen=True)
+class Orbit:
+    """The states visited by a simulation, which must eventually repeat"""
+
+    # Total number of flashes after every step up to the first repeated state
+    num_flashes: List[int]
+    tail: int
+    period: int
+    # First step after which every octopus has just flashed, if any
+    first_synchronized: Optional[int]
+
+    def total_flashes(self, num_step: int) -> int:
+        if num_step < len(self.num_flashes):
+            return self.num_flashes[num_step]
+        num_period, remainder = divmod(num_step - self.tail, self.period)
+        flashes_per_period = (
+            self.num_flashes[self.tail + self.period] - self.num_flashes[self.tail]
+        )
+        return self.num_flashes[self.tail + remainder] + num_period * flashes_per_period
+
+
+def _orbit(energy_levels: np.ndarray) -> Orbit:
+    """Simulate until a state repeats, remembering every state seen"""
+    neighbors = _neighbor_table(*energy_levels.shape)
+    flat = np.append(energy_levels.ravel(), np.int8(0))
+    seen = {}
+    num_flashes = [0]
+    first_synchronized = None
+    for step in itertools.count():
+        if first_synchronized is None and not flat.any():
+            first_synchronized = step
+        packed = _packed(flat)
+        if packed in seen:
+            tail = seen[packed]
+            return Orbit(num_flashes, tail, step - tail, first_synchronized)
+        seen[packed] = step
+        num_flashes.append(num_flashes[-1] + _step_array(flat, neighbors))
+    assert False
+
+
 def solution_1(path):
-    energy_levels = _read_energy_levels(path)
-    return _simulate(energy_levels, 100)
+    energy_levels = _read_energy_array(path)
+    return _simulate_array(energy_levels, 100)
 
 
 def solution_2(path):
-    energy_levels = _read_energy_levels(path)
-    max_row = max(map(operator.itemgetter(0), energy_levels))
-    max_col = max(map(operator.itemgetter(1), energy_levels))
-    for i in itertools.count():
-        if not any(energy_levels.values()):
-            break
-        _step(energy_levels, max_row, max_col)
-    return i
+    orbit = _orbit(_read_energy_array(path))
+    if orbit.first_synchronized is None:
+        raise ValueError("The octopuses never synchronize")
+    return orbit.first_synchronized
 
 
 @pytest.mark.parametrize(
@@ -174,6 +269,36 @@ def test_one_step(num_step, expected):
     assert _fmt_energy_levels(energy_levels, max_row, max_col) == expected
 
 
+@pytest.mark.parametrize("num_step", [0, 1, 2, 10, 100, 200])
+def test_simulate_array_agrees_with_simulate(num_step):
+    energy_levels = _read_energy_levels(INPUTS_PATH / "example.txt")
+    expected_num_flash = _simulate(energy_levels, num_step)
+    array = _read_energy_array(INPUTS_PATH / "example.txt")
+    assert _simulate_array(array, num_step) == expected_num_flash
+    assert array.tolist() == [
+        [energy_levels[row, col] for col in range(array.shape[1])]
+        for row in range(array.shape[0])
+    ]
+
+
+def test_orbit():
+    orbit = _orbit(_read_energy_array(INPUTS_PATH / "example.txt"))
+    assert orbit.first_synchronized == 195
+    for num_step in [0, 100, orbit.tail + 3 * orbit.period + 7]:
+        energy_levels = _read_energy_array(INPUTS_PATH / "example.txt")
+        assert orbit.total_flashes(num_step) == _simulate_array(energy_levels, num_step)
+
+
+def test_orbit_never_synchronized():
+    orbit = _orbit(np.array([[0, 5]], dtype=np.int8))
+    assert orbit.first_synchronized is None
+    assert orbit.period == 9
+    assert orbit.total_flashes(9 * 10**17) == 2 * 10**17
+    assert orbit.total_flashes(1000) == _simulate_array(
+        np.array([[0, 5]], dtype=np.int8), 1000
+    )
+
+
 def test_example_1():
     actual = solution_1(INPUTS_PATH / "example.txt")
     expected = 1656
@@ -1,7 +1,10 @@
 #!/usr/bin/env python3
 import collections
+import functools
+import itertools
 import logging
 import pathlib
+from typing import Iterator, List, Optional, Tuple
 
 import more_itertools
 import pytest
@@ -19,49 +22,135 @@ def _read_graph(path: pathlib.Path):
     return result
 
 
-def _paths(graph: dict[str, str], num_extra=0):
-    return _paths_helper(
-        graph,
-        frozenset(k for k in graph if k != "start"),
-        ("start",),
-        num_extra,
-    )
-
+def _paths_with_cursors(
+    graph: dict[str, str], num_extra=0, cursor: Optional[str] = None
+) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """Yield every path, in a deterministic order, with a cursor to resume after it"""
+    neighbors = {k: sorted(v) for k, v in graph.items()}
 
-def _paths_helper(graph: dict[str, str], allowed: frozenset[str], path, num_extra):
-    assert num_extra >= 0
-    if path[-1] == "end":
-        yield path
-        return
-
-    for dst in graph[path[-1]]:
+    def child_frame(frame, dst):
+        node, allowed, num_extra, _ = frame
         if dst == "start":
-            continue
+            return None
 
         if dst in allowed:
             new_num_extra = num_extra
         elif num_extra:
             new_num_extra = num_extra - 1
         else:
-            continue
+            return None
 
         if dst.islower():
             new_allowed = allowed - {dst}
         else:
             new_allowed = allowed
+        return [(dst, node), new_allowed, new_num_extra, 0]
+
+    allowed = frozenset(k for k in graph if k != "start")
+    stack = [[("start", None), allowed, num_extra, 0]]
+    if cursor:
+        *prefix, last = map(int, cursor.split("."))
+        for i in prefix:
+            stack[-1][3] = i + 1
+            stack.append(child_frame(stack[-1], neighbors[stack[-1][0][0]][i]))
+        stack[-1][3] = last + 1
+
+    while stack:
+        frame = stack[-1]
+        node, _, _, i = frame
+        choices = neighbors[node[0]]
+        if i == len(choices):
+            stack.pop()
+            continue
+
+        frame[3] = i + 1
+        child = child_frame(frame, choices[i])
+        if child is None:
+            continue
+
+        if choices[i] != "end":
+            stack.append(child)
+            continue
+
+        path = []
+        node = child[0]
+        while node is not None:
+            cave, node = node
+            path.append(cave)
+        yield tuple(reversed(path)), ".".join(str(f[3] - 1) for f in stack)
 
-        new_path = path + (dst,)
-        yield from _paths_helper(graph, new_allowed, new_path, new_num_extra)
 
+def _paths(graph: dict[str, str], num_extra=0):
+    return (path for path, _ in _paths_with_cursors(graph, num_extra))
 
-def solution_1(path):
+
+def _page_of_paths(
+    graph: dict[str, str], num_extra=0, cursor: Optional[str] = None, page_size=1000
+) -> Tuple[List[Tuple[str, ...]], Optional[str]]:
+    """Return up to `page_size` paths after `cursor` and the cursor of the next page"""
+    items = list(
+        itertools.islice(_paths_with_cursors(graph, num_extra, cursor), page_size + 1)
+    )
+    paths = [path for path, _ in items[:page_size]]
+    if len(items) <= page_size:
+        return paths, None
+    return paths, items[page_size - 1][1]
+
+
+def _small_cave_graph(
+    graph: dict[str, str]
+) -> Tuple[List[str], List[Tuple[Tuple[int, int], ...]]]:
+    """Return the small caves and the weighted edges between them"""
+    names = sorted(k for k in graph if k.islower())
+    indices = {name: i for i, name in enumerate(names)}
+    weights = [collections.Counter() for _ in names]
+    for src in names:
+        for via in graph[src]:
+            if via.islower():
+                weights[indices[src]][indices[via]] += 1
+                continue
+            for dst in graph[via]:
+                assert dst.islower()
+                weights[indices[src]][indices[dst]] += 1
+    return names, [tuple(w.items()) for w in weights]
+
+
+def _num_paths(graph: dict[str, str], num_extra=0) -> int:
+    """Return the number of paths that `_paths` would yield without enumerating them"""
+    names, edges = _small_cave_graph(graph)
+    start = names.index("start")
+    end = names.index("end")
+
+    @functools.lru_cache(maxsize=None)
+    def helper(src: int, visited: int, num_extra: int) -> int:
+        if src == end:
+            return 1
+
+        result = 0
+        for dst, weight in edges[src]:
+            if dst == start:
+                continue
+            if not visited >> dst & 1:
+                result += weight * helper(dst, visited | 1 << dst, num_extra)
+            elif num_extra:
+                result += weight * helper(dst, visited, num_extra - 1)
+        return result
+
+    return helper(start, 1 << start, num_extra)
+
+
+def solution_1(path, by_enumeration=False):
     graph = _read_graph(path)
-    return more_itertools.ilen(_paths(graph))
+    if by_enumeration:
+        return more_itertools.ilen(_paths(graph))
+    return _num_paths(graph)
 
 
-def solution_2(path):
+def solution_2(path, by_enumeration=False):
     graph = _read_graph(path)
-    return more_itertools.ilen(_paths(graph, 1))
+    if by_enumeration:
+        return more_itertools.ilen(_paths(graph, 1))
+    return _num_paths(graph, 1)
 
 
 @pytest.mark.parametrize(
@@ -75,6 +164,7 @@ def solution_2(path):
 )
 def test_part_1_on_examples(stem, expected):
     assert solution_1(INPUTS_PATH / f"{stem}.txt") == expected
+    assert solution_1(INPUTS_PATH / f"{stem}.txt", by_enumeration=True) == expected
 
 
 @pytest.mark.parametrize(
@@ -88,3 +178,25 @@ def test_part_1_on_examples(stem, expected):
 )
 def test_part_2_on_examples(stem, expected):
     assert solution_2(INPUTS_PATH / f"{stem}.txt") == expected
+    assert solution_2(INPUTS_PATH / f"{stem}.txt", by_enumeration=True) == expected
+
+
+@pytest.mark.parametrize("page_size", [1, 2, 7, 1000])
+def test_pages_concatenate_to_all_paths(page_size):
+    graph = _read_graph(INPUTS_PATH / "example_l.txt")
+    expected = list(_paths(graph, 1))
+    assert len(expected) == len(set(expected)) == 103
+
+    actual = []
+    paths, cursor = _page_of_paths(graph, 1, None, page_size)
+    actual.extend(paths)
+    while cursor is not None:
+        paths, cursor = _page_of_paths(graph, 1, cursor, page_size)
+        actual.extend(paths)
+    assert actual == expected
+
+
+@pytest.mark.parametrize("num_extra", [0, 1, 2, 3])
+def test_num_paths_agrees_with_paths(num_extra):
+    graph = _read_graph(INPUTS_PATH / "example_l.txt")
+    assert _num_paths(graph, num_extra) == more_itertools.ilen(_paths(graph, num_extra))
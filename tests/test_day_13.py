@@ -2,8 +2,10 @@
 import logging
 import pathlib
 import re
+from typing import Tuple
 
 import more_itertools
+import numpy as np
 import pytest
 
 logger = logging.getLogger(__name__)
@@ -80,6 +82,39 @@ def _read_folds(path: pathlib.Path):
     ]
 
 
+def _read_point_arrays(path: pathlib.Path) -> Tuple[np.ndarray, np.ndarray]:
+    matches = re.findall(r"^(\d+),(\d+)$", path.read_text(), re.MULTILINE)
+    xs, ys = np.array(matches, dtype=np.int64).reshape(-1, 2).T
+    return xs, ys
+
+
+def _fold_table(size, locations) -> Tuple[np.ndarray, np.ndarray]:
+    """Return where every coordinate below `size` ends up after all folds on one axis"""
+    table = np.arange(size)
+    on_fold = np.zeros(size, dtype=bool)
+    for location in locations:
+        on_fold |= table == location
+        table = np.where(table < location, table, 2 * location - table)
+    return table, on_fold
+
+
+def _folded_arrays(xs, ys, folds) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the distinct points left after applying all folds"""
+    tables = {}
+    for axis, coordinates in (("x", xs), ("y", ys)):
+        locations = [location for a, location in folds if a == axis]
+        table, on_fold = _fold_table(coordinates.max() + 1, locations)
+        assert not on_fold[coordinates].any()
+        tables[axis] = table
+    xs, ys = tables["x"][xs], tables["y"][ys]
+
+    x_min, y_min = xs.min(), ys.min()
+    height = ys.max() - y_min + 1
+    keys = np.unique((xs - x_min) * height + (ys - y_min))
+    xs, ys = np.divmod(keys, height)
+    return xs + x_min, ys + y_min
+
+
 def _folded_horizontal(points, row):
     assert not any(y == row for _, y in points)
     return {(x, y) if y < row else (x, 2 * row - y) for x, y in points}
@@ -159,17 +194,28 @@ def _decode_points(points, path=()):
 
 
 def solution_1(path):
-    points = _read_points(path)
+    xs, ys = _read_point_arrays(path)
     folds = _read_folds(path)
-    return len(_folded(points, *folds[0]))
+    xs, _ = _folded_arrays(xs, ys, folds[:1])
+    return len(xs)
 
 
 def solution_2(path):
-    points = _read_points(path)
+    xs, ys = _read_point_arrays(path)
     folds = _read_folds(path)
+    xs, ys = _folded_arrays(xs, ys, folds)
+    return _decode_points(set(zip(xs.tolist(), ys.tolist())))
+
+
+@pytest.mark.parametrize("num_fold", [0, 1, 2])
+def test_folded_arrays_agrees_with_folded(num_fold):
+    path = INPUTS_PATH / "example.txt"
+    folds = _read_folds(path)[:num_fold]
+    expected = _read_points(path)
     for fold in folds:
-        points = _folded(points, *fold)
-    return _decode_points(points)
+        expected = _folded(expected, *fold)
+    xs, ys = _folded_arrays(*_read_point_arrays(path), folds)
+    assert sorted(zip(xs.tolist(), ys.tolist())) == sorted(expected)
 
 
 @pytest.mark.parametrize(